@@ -2,6 +2,10 @@ import numpy as np
 import pandas as pd
 import ulamdyn as umd
 import os
+import re
+import itertools
+import mmap
+from concurrent.futures import ThreadPoolExecutor
 
 
 class ExtendedAnalysis:
@@ -10,6 +14,11 @@ class ExtendedAnalysis:
     TRAJ folders (original method) and standalone XYZ files.
     """
     
+    # Metadata patterns for XYZ comment lines, e.g.
+    # "TRAJ = 1 | Time = 3.0 fs | ...". Compiled once for all files.
+    _TRAJ_RE = re.compile(r'TRAJ[^|\d]*(\d+)')
+    _TIME_RE = re.compile(r'Time[^|\d.-]*(-?(?:\d+\.?\d*|\.\d+))')
+    
     def __init__(self):
         self.geoms_loader = umd.GetCoords()
         self.coords = None
@@ -25,7 +34,48 @@ class ExtendedAnalysis:
         print(f"Loaded {len(self.geoms_loader.xyz)} geometries from TRAJ folders")
         return self
     
-    def _parse_xyz_custom(self, xyz_file):
+    def _scan_xyz_frames(self, xyz_file):
+        """
+        Size an XYZ file without parsing coordinates.
+        
+        The file is memory-mapped and its newlines are counted in chunks, so
+        pages are read on demand and memory use stays flat. The frame count
+        is an upper bound: stray or malformed lines can only add to it, and
+        the parser trims the unused rows.
+        
+        Returns:
+        --------
+        n_frames : int
+            Upper bound on the number of complete frames
+        n_atoms : int
+            Number of atoms in the first frame (0 if there are no frames)
+        """
+        chunk_size = 1 << 22
+        with open(xyz_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return 0, 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Locate the first atom-count line
+                for header in iter(mm.readline, b''):
+                    try:
+                        n_atoms = int(header)
+                        break
+                    except ValueError:
+                        continue
+                else:
+                    return 0, 0
+                
+                # Count the lines from that header on; every complete frame
+                # takes exactly n_atoms + 2 of them
+                start = mm.tell() - len(header)
+                n_lines = 0
+                for pos in range(start, len(mm), chunk_size):
+                    n_lines += mm[pos:pos + chunk_size].count(b'\n')
+                if mm[-1:] != b'\n':
+                    n_lines += 1
+        return n_lines // (n_atoms + 2), n_atoms
+    
+    def _parse_xyz_custom(self, xyz_file, out=None):
         """
         Custom XYZ parser that handles files with metadata in comment lines.
         This works with files that have format:
@@ -34,30 +84,59 @@ class ExtendedAnalysis:
         - Lines 3+: element x y z
         
         Also parses Time and TRAJ information from comment lines.
+        
+        Parameters:
+        -----------
+        xyz_file : str
+            Path to the XYZ file
+        out : numpy.ndarray, optional
+            Preallocated array of shape (n_frames, n_atoms, 3) that is filled
+            in place. If None (default), a new array is allocated.
         """
-        geometries = []
+        if out is None:
+            # First pass: count the frames so the output array can be allocated
+            # once; the file is streamed so only one frame is held in memory
+            n_frames, n_atoms = self._scan_xyz_frames(xyz_file)
+            if n_frames == 0:
+                raise ValueError(f"No valid geometries found in {xyz_file}")
+            out = np.empty((n_frames, n_atoms, 3))
+        
+        geometries = out
+        n_atoms = geometries.shape[1]
         labels = []
         times = []
         trajs = []
         
-        with open(xyz_file, 'r') as f:
-            lines = f.readlines()
-        
-        i = 0
+        # Second pass: parse each coordinate block in a single NumPy call
         geom_idx = 0
-        while i < len(lines):
-            try:
-                # Read number of atoms
-                n_atoms = int(lines[i].strip())
-                i += 1
+        with open(xyz_file, 'r') as f:
+            for header in f:
+                # Read number of atoms, skipping malformed entries
+                try:
+                    n = int(header)
+                except ValueError:
+                    continue
                 
-                # Read comment/metadata line (if it exists)
-                # Handle cases where comment line might be missing or empty
-                if i < len(lines):
-                    comment = lines[i].strip() if lines[i].strip() else f"Geometry {geom_idx}"
-                else:
-                    comment = f"Geometry {geom_idx}"
+                # Comment line followed by the coordinate block
+                block = list(itertools.islice(f, n + 1))
+                if len(block) < n + 1:
+                    # Incomplete trailing geometry
+                    break
+                if n != n_atoms:
+                    raise ValueError(f"Inconsistent number of atoms in {xyz_file}")
+                if geom_idx == len(geometries):
+                    raise ValueError(f"Output array too small for {xyz_file}")
+                
+                # Read atomic coordinates (element x y z); drop malformed
+                # geometries
+                try:
+                    coords = np.loadtxt(block[1:], usecols=(1, 2, 3), ndmin=2)
+                except (ValueError, IndexError):
+                    continue
+                geometries[geom_idx] = coords
                 
+                # Read comment/metadata line; an empty line gets a default label
+                comment = block[0].strip() or f"Geometry {geom_idx}"
                 labels.append(comment)
                 
                 # Parse Time and TRAJ from comment if available
@@ -66,60 +145,59 @@ class ExtendedAnalysis:
                 time_val = geom_idx
                 traj_val = 0
                 
-                # Only try to parse if comment contains these keywords
-                if comment and "Time" in comment:
-                    try:
-                        # Extract time value
-                        time_part = comment.split("Time")[1].split("|")[0]
-                        time_str = ''.join([c for c in time_part if c.isdigit() or c == '.' or c == '-'])
-                        time_val = float(time_str) if time_str else geom_idx
-                    except:
-                        time_val = geom_idx
+                time_match = self._TIME_RE.search(comment)
+                if time_match:
+                    time_val = float(time_match.group(1))
                 
-                if comment and "TRAJ" in comment:
-                    try:
-                        # Extract trajectory number
-                        traj_part = comment.split("TRAJ")[1].split("|")[0]
-                        traj_str = ''.join([c for c in traj_part if c.isdigit()])
-                        traj_val = int(traj_str) if traj_str else 0
-                    except:
-                        traj_val = 0
+                traj_match = self._TRAJ_RE.search(comment)
+                if traj_match:
+                    traj_val = int(traj_match.group(1))
                 
                 times.append(time_val)
                 trajs.append(traj_val)
-                i += 1
-                
-                # Read atomic coordinates
-                coords = []
-                for j in range(n_atoms):
-                    if i >= len(lines):
-                        break
-                    parts = lines[i].strip().split()
-                    if len(parts) >= 4:  # element x y z
-                        x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
-                        coords.append([x, y, z])
-                    i += 1
-                
-                if len(coords) == n_atoms:
-                    geometries.append(coords)
-                    geom_idx += 1
-                else:
-                    # Remove incomplete geometry metadata
-                    labels.pop()
-                    times.pop()
-                    trajs.pop()
-                    
-            except (ValueError, IndexError) as e:
-                # Skip malformed entries
-                i += 1
-                continue
+                geom_idx += 1
         
-        if not geometries:
+        if geom_idx == 0:
             raise ValueError(f"No valid geometries found in {xyz_file}")
         
-        return (np.array(geometries), np.array(labels), 
+        return (geometries[:geom_idx], np.array(labels), 
                 np.array(times), np.array(trajs))
     
+    def _build_dataset(self, coords, times, trajs):
+        """
+        Build a DataFrame compatible with ClusterGeoms: TRAJ and Time columns
+        followed by the flattened coordinates, shape (n_geoms, n_atoms * 3).
+        
+        All columns are collected in one dict and the DataFrame is built in a
+        single call, which gives one consolidated float block for the
+        coordinates instead of a frame that grows by column inserts.
+        """
+        n_geoms = len(coords)
+        # A view of the (contiguous) coordinate array; pandas copies the
+        # columns into its own block, so no column-major copy is made here
+        flattened_coords = coords.reshape(n_geoms, -1)
+        columns = {"TRAJ": trajs, "Time": times}
+        columns.update(zip(range(flattened_coords.shape[1]), flattened_coords.T))
+        return pd.DataFrame(columns)
+    
+    def _finalize_load(self, coords, labels, times, trajs, source_type):
+        """
+        Store loaded geometries and their metadata on this object and on the
+        geoms_loader, and build the dataset used by ClusterGeoms.
+        """
+        # Manually set the loaded data to the geoms_loader object
+        self.geoms_loader.xyz = coords
+        self.geoms_loader.labels = labels
+        # traj_time should be 2D array with shape (n_geoms, 2) -> [TRAJ, Time]
+        self.geoms_loader.traj_time = np.column_stack([trajs, times])
+        self.geoms_loader.trajectories = trajs
+        self.coords = coords
+        self.labels = labels
+        self.source_type = source_type
+        
+        # Create a dataset compatible with ClusterGeoms
+        self.geoms_loader.dataset = self._build_dataset(coords, times, trajs)
+    
     def load_from_xyz(self, xyz_file, use_ulamdyn_parser=False):
         """
         Load geometries from a standalone XYZ file.
@@ -131,80 +209,28 @@ class ExtendedAnalysis:
         use_ulamdyn_parser : bool
             If True, use ulamdyn's built-in parser (for TRAJ-style XYZ files).
             If False (default), use custom parser for files with metadata in comments.
+            The selected parser is not retried with the other one: its error
+            is raised as is, and the caller must choose the right setting.
         """
         print(f"Loading from XYZ file: {xyz_file}")
         
         if not os.path.exists(xyz_file):
             raise FileNotFoundError(f"XYZ file not found: {xyz_file}")
         
-        try:
-            if use_ulamdyn_parser:
-                # Use ulamdyn's from_xyz method
-                coords, labels = self.geoms_loader.from_xyz(xyz_file)
-                # Create dummy Time and TRAJ
-                times = np.arange(len(coords))
-                trajs = np.zeros(len(coords), dtype=int)
-            else:
-                # Use custom parser
-                coords, labels, times, trajs = self._parse_xyz_custom(xyz_file)
-            
-            # Manually set the loaded data to the geoms_loader object
-            self.geoms_loader.xyz = coords
-            self.geoms_loader.labels = labels
-            # traj_time should be 2D array with shape (n_geoms, 2) -> [TRAJ, Time]
-            self.geoms_loader.traj_time = np.column_stack([trajs, times])
-            self.geoms_loader.trajectories = trajs
-            self.coords = coords
-            self.labels = labels
-            self.source_type = "xyz"
-            
-            # Create a dataset compatible with ClusterGeoms
-            # Reshape xyz to 2D: (n_geoms, n_atoms * 3)
-            n_geoms = len(coords)
-            flattened_coords = coords.reshape(n_geoms, -1)
-            
-            # Create DataFrame with TRAJ and Time columns
-            df = pd.DataFrame(flattened_coords)
-            df.insert(0, "Time", times)
-            df.insert(0, "TRAJ", trajs)
-            self.geoms_loader.dataset = df
-            
-            print(f"Loaded {len(coords)} geometries from XYZ file")
-            print(f"Geometry shape: {coords.shape}")
-            
-        except Exception as e:
-            print(f"Error loading XYZ file: {e}")
-            print("Trying alternative parser...")
-            # Try the other parser if one fails
-            try:
-                if use_ulamdyn_parser:
-                    coords, labels, times, trajs = self._parse_xyz_custom(xyz_file)
-                else:
-                    coords, labels = self.geoms_loader.from_xyz(xyz_file)
-                    times = np.arange(len(coords))
-                    trajs = np.zeros(len(coords), dtype=int)
-                
-                self.geoms_loader.xyz = coords
-                self.geoms_loader.labels = labels
-                # traj_time should be 2D array with shape (n_geoms, 2) -> [TRAJ, Time]
-                self.geoms_loader.traj_time = np.column_stack([trajs, times])
-                self.geoms_loader.trajectories = trajs
-                self.coords = coords
-                self.labels = labels
-                self.source_type = "xyz"
-                
-                # Create a dataset compatible with ClusterGeoms
-                n_geoms = len(coords)
-                flattened_coords = coords.reshape(n_geoms, -1)
-                df = pd.DataFrame(flattened_coords)
-                df.insert(0, "Time", times)
-                df.insert(0, "TRAJ", trajs)
-                self.geoms_loader.dataset = df
-                
-                print(f"Loaded {len(coords)} geometries from XYZ file")
-                print(f"Geometry shape: {coords.shape}")
-            except Exception as e2:
-                raise RuntimeError(f"Failed to load XYZ file with both parsers: {e}, {e2}")
+        if use_ulamdyn_parser:
+            # Use ulamdyn's from_xyz method
+            coords, labels = self.geoms_loader.from_xyz(xyz_file)
+            # Create dummy Time and TRAJ
+            times = np.arange(len(coords))
+            trajs = np.zeros(len(coords), dtype=int)
+        else:
+            # Use custom parser
+            coords, labels, times, trajs = self._parse_xyz_custom(xyz_file)
+        
+        self._finalize_load(coords, labels, times, trajs, source_type="xyz")
+        
+        print(f"Loaded {len(coords)} geometries from XYZ file")
+        print(f"Geometry shape: {coords.shape}")
         
         return self
     
@@ -219,57 +245,94 @@ class ExtendedAnalysis:
         use_ulamdyn_parser : bool
             If True, use ulamdyn's built-in parser. If False, use custom parser.
         """
-        all_coords = []
         all_labels = []
         all_times = []
         all_trajs = []
         
         print(f"Loading from {len(xyz_files)} XYZ files...")
         
+        existing_files = []
         for xyz_file in xyz_files:
             if not os.path.exists(xyz_file):
                 print(f"Warning: File not found, skipping: {xyz_file}")
                 continue
-            
+            existing_files.append(xyz_file)
+        
+        # First pass: count the frames of every file so all geometries can be
+        # written into a single preallocated array instead of concatenated
+        frame_counts = []
+        n_atoms = 0
+        readable_files = []
+        for xyz_file in existing_files:
             try:
-                if use_ulamdyn_parser:
-                    coords, labels = self.geoms_loader.from_xyz(xyz_file)
-                    times = np.arange(len(coords))
-                    trajs = np.zeros(len(coords), dtype=int)
-                else:
-                    coords, labels, times, trajs = self._parse_xyz_custom(xyz_file)
-                
-                all_coords.append(coords)
-                all_labels.append(labels)
-                all_times.append(times)
-                all_trajs.append(trajs)
-                print(f"  Loaded {len(coords)} geometries from {os.path.basename(xyz_file)}")
+                n_frames, file_atoms = self._scan_xyz_frames(xyz_file)
+            except OSError as e:
+                print(f"Warning: Error loading {xyz_file}: {e}")
+                continue
+            readable_files.append(xyz_file)
+            frame_counts.append(n_frames)
+            if not file_atoms:
+                continue
+            if not n_atoms:
+                n_atoms, atoms_file = file_atoms, xyz_file
+            elif file_atoms != n_atoms:
+                # Geometries with different atom counts cannot be combined
+                raise ValueError(
+                    f"Inconsistent number of atoms: {atoms_file} has {n_atoms} "
+                    f"atoms, {xyz_file} has {file_atoms}")
+        existing_files = readable_files
+        all_coords = np.empty((sum(frame_counts), n_atoms, 3))
+        
+        # Second pass: parse the files concurrently, each directly into its
+        # own slice; most of the work is file I/O and NumPy parsing
+        starts = np.cumsum([0] + frame_counts[:-1])
+        
+        def load_one(xyz_file, start, n_frames):
+            dest = all_coords[start:start + n_frames]
+            if use_ulamdyn_parser:
+                coords, labels = self.geoms_loader.from_xyz(xyz_file)
+                dest[:len(coords)] = coords
+                coords = dest[:len(coords)]
+                times = np.arange(len(coords))
+                trajs = np.zeros(len(coords), dtype=int)
+                return coords, labels, times, trajs
+            return self._parse_xyz_custom(xyz_file, out=dest)
+        
+        # ulamdyn's parser works through the shared geoms_loader, so it is
+        # not run from several threads at once
+        max_workers = 1 if use_ulamdyn_parser else min(8, max(1, len(existing_files)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(load_one, xyz_file, start, n_frames)
+                       for xyz_file, start, n_frames in zip(existing_files, starts, frame_counts)]
+        
+        offset = 0
+        for xyz_file, start, future in zip(existing_files, starts, futures):
+            try:
+                coords, labels, times, trajs = future.result()
             except Exception as e:
                 print(f"Warning: Error loading {xyz_file}: {e}")
                 continue
-        
-        if not all_coords:
+            
+            if start != offset:
+                # Close the gap left by dropped frames or skipped files
+                all_coords[offset:offset + len(coords)] = coords
+            all_labels.append(labels)
+            all_times.append(times)
+            all_trajs.append(trajs)
+            offset += len(coords)
+            print(f"  Loaded {len(coords)} geometries from {os.path.basename(xyz_file)}")
+        
+        if offset == 0:
             raise ValueError("No geometries loaded from any file")
         
-        # Concatenate all geometries
-        self.coords = np.concatenate(all_coords, axis=0)
-        self.labels = np.concatenate(all_labels, axis=0)
-        all_trajs_concat = np.concatenate(all_trajs, axis=0)
-        all_times_concat = np.concatenate(all_times, axis=0)
-        self.geoms_loader.xyz = self.coords
-        self.geoms_loader.labels = self.labels
-        # traj_time should be 2D array with shape (n_geoms, 2) -> [TRAJ, Time]
-        self.geoms_loader.traj_time = np.column_stack([all_trajs_concat, all_times_concat])
-        self.geoms_loader.trajectories = all_trajs_concat
-        self.source_type = "xyz_multiple"
-        
-        # Create a dataset compatible with ClusterGeoms
-        n_geoms = len(self.coords)
-        flattened_coords = self.coords.reshape(n_geoms, -1)
-        df = pd.DataFrame(flattened_coords)
-        df.insert(0, "Time", all_times_concat)
-        df.insert(0, "TRAJ", all_trajs_concat)
-        self.geoms_loader.dataset = df
+        # Geometries are already contiguous; concatenate the metadata
+        self._finalize_load(
+            all_coords[:offset],
+            np.concatenate(all_labels, axis=0),
+            np.concatenate(all_times, axis=0),
+            np.concatenate(all_trajs, axis=0),
+            source_type="xyz_multiple",
+        )
         
         print(f"Total: {len(self.coords)} geometries loaded")
         print(f"Geometry shape: {self.coords.shape}")
@@ -345,47 +408,62 @@ class ExtendedAnalysis:
         print(f"Ring atoms: {ring_atom_indices}")
         
         n_geoms = len(self.geoms_loader.xyz)
-        results = []
         
-        for i, geom in enumerate(self.geoms_loader.xyz):
-            # Extract ring coordinates for this geometry (0-indexed)
-            ring_coords = geom[ring_atom_indices]
-            
-            # Create RingParams object and calculate puckering parameters
-            # RingParams expects 1-indexed atoms!
-            ring_atom_indices_1indexed = [idx + 1 for idx in ring_atom_indices]
-            ring_params = umd.RingParams(
-                ring_atom_ind=ring_atom_indices_1indexed,
-                ring_coords=ring_coords
-            )
-            
-            # Get puckering coordinates
-            # For 6-membered rings: returns [q2, q3, phi2, phi3]
-            # Need to convert to polar coords: Q, theta, phi
+        # Extract ring coordinates for all geometries at once (0-indexed):
+        # shape (n_geoms, n_ring_atoms, 3). One contiguous float64 block, so
+        # each per-geometry ring_stack[i] below is a view, not a copy
+        ring_stack = np.ascontiguousarray(
+            self.geoms_loader.xyz[:, ring_atom_indices, :], dtype=np.float64
+        )
+        
+        # A single RingParams object serves every geometry
+        # RingParams expects 1-indexed atoms!
+        ring_atom_indices_1indexed = [idx + 1 for idx in ring_atom_indices]
+        ring_params = umd.RingParams(
+            ring_atom_ind=ring_atom_indices_1indexed,
+            ring_coords=ring_stack[0]
+        )
+        
+        # Get puckering coordinates for every geometry
+        # For 6-membered rings: returns [q2, q3, phi2, phi3]
+        # Geometries that fail keep a row of NaN
+        pucker = None
+        for i, ring_coords in enumerate(ring_stack):
             try:
-                pucker = ring_params.get_pucker_coords(ring_coords)
-                # Convert to polar coordinates using ulamdyn's method
-                polar = ring_params._cp_to_polar(pucker.reshape(1, -1))
-                q_val = polar['Q'][0]
-                theta_val = polar['theta'][0] * np.pi / 180  # Convert to radians
-                phi_val = polar['phi'][0]
-            except Exception as e:
-                q_val, theta_val, phi_val = None, None, None
-            
-            results.append({
-                'geometry_idx': i,
-                'q': q_val,
-                'theta': theta_val,
-                'phi': phi_val,
-            })
+                cppar = np.ravel(ring_params.get_pucker_coords(ring_coords))
+                if pucker is None:
+                    pucker = np.full((n_geoms, cppar.size), np.nan)
+                pucker[i] = cppar
+            except Exception:
+                # Leave this geometry as NaN
+                pass
             
             if (i + 1) % 100 == 0:
                 print(f"  Processed {i + 1}/{n_geoms} geometries")
         
+        # Convert all puckering coordinates to polar coordinates (Q, theta, phi)
+        # with a single call to ulamdyn's method
+        q_vals = np.full(n_geoms, np.nan)
+        theta_vals = np.full(n_geoms, np.nan)
+        phi_vals = np.full(n_geoms, np.nan)
+        if pucker is not None:
+            valid = ~np.isnan(pucker).any(axis=1)
+            polar = ring_params._cp_to_polar(pucker[valid])
+            deg2rad = np.pi / 180.0
+            q_vals[valid] = np.asarray(polar['Q'])
+            theta_vals[valid] = np.asarray(polar['theta']) * deg2rad  # Convert to radians
+            phi_vals[valid] = np.asarray(polar['phi'])
+        
         print(f"Cramer-Pople analysis completed for {n_geoms} geometries")
         
-        # Convert to DataFrame for easier analysis
-        df = pd.DataFrame(results)
+        # Convert to DataFrame for easier analysis; the column arrays are
+        # already typed, so let pandas wrap them without copying
+        df = pd.DataFrame({
+            'geometry_idx': np.arange(n_geoms),
+            'q': q_vals,
+            'theta': theta_vals,
+            'phi': phi_vals,
+        }, copy=False)
         
         return df
     
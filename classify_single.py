@@ -29,18 +29,27 @@ print(f'✅ Cramer-Pople analysis complete')
 # Classify
 print('Classifying conformations...')
 ring_atoms_1indexed = [a + 1 for a in ring_atoms]  # Convert to 1-indexed for ulamdyn
-conformations = []
 
-for idx, row in cp_results.iterrows():
+# The classification only depends on (theta, phi), so a single RingParams
+# object serves every geometry
+ring_coords = analysis.coords[0][ring_atoms]  # Extract using 0-indexed
+ring_coords_centered = ring_coords - ring_coords.mean(axis=0)
+ring_params = RingParams(ring_atoms_1indexed, ring_coords=ring_coords_centered)
+
+theta_deg = np.degrees(cp_results['theta'].to_numpy())
+phi = cp_results['phi'].to_numpy()
+# Geometries without puckering parameters cannot be classified
+valid_mask = ~(np.isnan(theta_deg) | np.isnan(phi))
+
+# Preallocate the labels and fill only the valid rows by index
+conformations = np.full(len(cp_results), 'ERROR', dtype=object)
+theta_list = theta_deg.tolist()
+phi_list = phi.tolist()
+for i in np.flatnonzero(valid_mask).tolist():
     try:
-        coords = analysis.coords[int(row['geometry_idx'])]
-        ring_coords = coords[ring_atoms]  # Extract using 0-indexed
-        ring_coords_centered = ring_coords - ring_coords.mean(axis=0)
-        ring_params = RingParams(ring_atoms_1indexed, ring_coords=ring_coords_centered)
-        theta_deg = np.degrees(row['theta'])
-        conformations.append(ring_params.get_conf_6memb(theta_deg, row['phi']))
-    except:
-        conformations.append('ERROR')
+        conformations[i] = ring_params.get_conf_6memb(theta_list[i], phi_list[i])
+    except Exception:
+        conformations[i] = 'ERROR'
 
 cp_results['conformation'] = conformations
 valid = cp_results[cp_results['conformation'] != 'ERROR']
@@ -61,8 +70,8 @@ with open(output_file, 'w') as f:
     f.write(f'# Ring atoms: {ring_atoms}\n')
     f.write(f'#\n')
     f.write(f'  geometry_idx              q          theta            phi  conformation\n')
-    for _, row in cp_results.iterrows():
-        f.write(f'{int(row["geometry_idx"]):14d}  {row["q"]:13.8f}  {row["theta"]:13.8f}  {row["phi"]:13.8f}  {row["conformation"]:>12s}\n')
+    rows = cp_results[['geometry_idx', 'q', 'theta', 'phi', 'conformation']].to_numpy(dtype=object)
+    np.savetxt(f, rows, fmt='%14d  %13.8f  %13.8f  %13.8f  %12s')
     
     # Add summary statistics
     f.write(f'\n# Summary Statistics\n')
@@ -6,6 +6,7 @@ Creates a 2D scatter plot with:
 - X-axis: phi (azimuthal angle, 0-360 degrees)
 - Y-axis: theta (polar angle, 0-360 degrees)
 - Color: q (puckering amplitude) as heatmap
+- Large datasets are drawn as a hexbin map of mean q instead
 
 Supports both .params.dat and .classified.dat file formats.
 
@@ -16,17 +17,33 @@ Usage:
 """
 
 import sys
+import os
+import functools
+import itertools
 import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
 from matplotlib.colors import Normalize
 from matplotlib.cm import ScalarMappable
 
+# Above this many geometries the 2D map is drawn as a hexbin of mean q
+# instead of one marker per geometry
+HEXBIN_THRESHOLD = 5000
+
+# Number of parsed parameter files kept in memory by read_params_file
+PARAMS_CACHE_SIZE = 4
+
 
 def read_params_file(filename):
     """
     Read Cramer-Pople parameters from .params.dat or .classified.dat file
     
+    Parsed files are cached per modification time. This only pays off when
+    the module is used as a library, e.g. calling plot_2d_puckering on the
+    same file several times from a notebook or interactive session; the
+    command-line main() reads every file once. The cache holds only a few
+    files so it does not keep many parsed frames alive.
+    
     Parameters:
     -----------
     filename : str
@@ -37,22 +54,46 @@ def read_params_file(filename):
     df : pandas.DataFrame
         DataFrame with columns: geometry_idx, q, theta, phi, and optionally conformation
     """
-    # Read data, skipping comment lines
-    df = pd.read_csv(filename, sep=r'\s+', comment='#')
-    
-    # Check if conformation column exists (for .classified.dat files)
-    if 'conformation' in df.columns:
-        # Keep conformation as string, convert others to numeric
-        numeric_cols = ['geometry_idx', 'q', 'theta', 'phi']
-        df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
-    else:
-        # Ensure all columns are numeric for .params.dat files
-        df = df.apply(pd.to_numeric, errors='coerce')
-    
-    return df
+    df = _read_params_cached(filename, os.path.getmtime(filename))
+    # Return a copy so callers cannot modify the cached frame
+    return df.copy()
+
 
+@functools.lru_cache(maxsize=PARAMS_CACHE_SIZE)
+def _read_params_cached(filename, mtime):
+    """Parse a parameters file; ``mtime`` only keys the cache"""
+    # Column names come from the header line (first non-comment line)
+    with open(filename, 'r') as f:
+        for header_idx, line in enumerate(f):
+            if line.strip() and not line.lstrip().startswith('#'):
+                columns = line.split()
+                break
+        else:
+            raise ValueError(f"No header line found in {filename}")
+    
+    # Read numeric columns with NumPy's C tokenizer, skipping comment lines
+    numeric_cols = [col for col in columns if col != 'conformation']
+    values = np.loadtxt(filename, comments='#', skiprows=header_idx + 1,
+                        usecols=[columns.index(col) for col in numeric_cols],
+                        ndmin=2)
+    data = {col: values[:, k] for k, col in enumerate(numeric_cols)}
+    if 'geometry_idx' in data:
+        data['geometry_idx'] = data['geometry_idx'].astype(int)
+    
+    # Keep conformation as string (for .classified.dat files)
+    if 'conformation' in columns:
+        conf_idx = columns.index('conformation')
+        with open(filename, 'r') as f:
+            rows = itertools.islice(f, header_idx + 1, None)
+            data['conformation'] = np.array([
+                line.split()[conf_idx] for line in rows
+                if line.strip() and not line.lstrip().startswith('#')
+            ])
+    
+    return pd.DataFrame(data)
 
-def plot_2d_puckering(param_file, output_file=None):
+
+def plot_2d_puckering(param_file, output_file=None, ax=None):
     """
     Create 2D scatter plot of theta vs phi colored by q
     
@@ -62,14 +103,23 @@ def plot_2d_puckering(param_file, output_file=None):
         Path to .params.dat file
     output_file : str, optional
         Output PDF filename
+    ax : matplotlib.axes.Axes, optional
+        Axes to draw on. It is cleared first and its figure is left open,
+        so one figure can be reused for several files. If None, a new
+        figure is created and closed after saving.
     """
     # Read data
     df = read_params_file(param_file)
     label = param_file.replace('.params.dat', '').replace('.spawn.classified.dat', '').replace('.classified.dat', '')
     spawn_num = label.split('.')[0] if '.' in label else label
     
-    # Create figure
-    fig, ax = plt.subplots(1, 1, figsize=(10, 8))
+    # Create figure, or clear the one being reused
+    own_figure = ax is None
+    if own_figure:
+        fig, ax = plt.subplots(1, 1, figsize=(10, 8))
+    else:
+        fig = ax.figure
+        ax.cla()
     
     # Convert theta from radians to degrees (0-360)
     theta_deg = np.rad2deg(df['theta'].values)
@@ -82,14 +132,23 @@ def plot_2d_puckering(param_file, output_file=None):
     # Get q values
     q_vals = df['q'].values
     
-    # Create scatter plot - color based on q value
-    scatter = ax.scatter(phi_deg, theta_deg, c=q_vals, 
-                       cmap='viridis', s=40, alpha=0.7,
-                       edgecolors='black', linewidths=0.3)
+    if len(df) > HEXBIN_THRESHOLD:
+        # Large point clouds: bin into hexagons colored by mean q, so the
+        # number of drawn elements does not grow with the number of points
+        mappable = ax.hexbin(phi_deg, theta_deg, C=q_vals,
+                             reduce_C_function=np.mean, gridsize=60,
+                             extent=(0, 360, 0, 360), cmap='viridis')
+        q_label = 'mean q (Å)'
+    else:
+        # Create scatter plot - color based on q value
+        mappable = ax.scatter(phi_deg, theta_deg, c=q_vals, 
+                              cmap='viridis', s=40, alpha=0.7,
+                              edgecolors='black', linewidths=0.3)
+        q_label = 'q (Å)'
     
     # Add colorbar
-    cbar = plt.colorbar(scatter, ax=ax)
-    cbar.set_label('q (Å)', fontsize=12, fontweight='bold')
+    cbar = fig.colorbar(mappable, ax=ax)
+    cbar.set_label(q_label, fontsize=12, fontweight='bold')
     
     # Configure axes
     ax.set_xlabel('φ (degrees)', fontsize=14, fontweight='bold')
@@ -111,17 +170,21 @@ def plot_2d_puckering(param_file, output_file=None):
            fontsize=10, verticalalignment='top',
            bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Determine output filename
     if output_file is None:
         output_file = f"{label}_2d.pdf"
     
     # Save as PDF
-    plt.savefig(output_file, format='pdf', dpi=300, bbox_inches='tight')
+    fig.savefig(output_file, format='pdf', dpi=300, bbox_inches='tight')
     print(f"✅ Saved 2D plot to {output_file}")
     
-    plt.close()
+    if own_figure:
+        plt.close(fig)
+    else:
+        # Drop the colorbar so the next plot on this axes starts clean
+        cbar.remove()
 
 
 def main():
@@ -142,10 +205,12 @@ def main():
     print(f"Files to plot: {param_files}")
     print()
     
-    # Create individual plot for each file
+    # Create individual plot for each file, reusing a single figure
     print("Creating 2D puckering plots...")
+    fig, ax = plt.subplots(1, 1, figsize=(10, 8))
     for param_file in param_files:
-        plot_2d_puckering(param_file)
+        plot_2d_puckering(param_file, ax=ax)
+    plt.close(fig)
     
     print("\n✅ All 2D plots created successfully!")
 
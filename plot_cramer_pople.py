@@ -14,14 +14,26 @@ Usage:
     python plot_cramer_pople.py 6.params.dat
     python plot_cramer_pople.py 2.spawn.classified.dat
     python plot_cramer_pople.py 2.params.dat 3.params.dat 4.params.dat
+    python plot_cramer_pople.py --gpu 2.params.dat 3.params.dat    (interactive, needs vispy)
 """
 
 import sys
+import os
+import itertools
+import importlib.util
+import tempfile
+import zipfile
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
+from matplotlib.colors import to_rgba_array
+from matplotlib.lines import Line2D
 import pandas as pd
 
+# Format version of the .npz sidecars written by read_params_file; bump it
+# whenever the parser or the column dtypes change so old sidecars are ignored
+PARAMS_CACHE_VERSION = 1
+
 
 def read_params_file(filename):
     """
@@ -35,19 +47,86 @@ def read_params_file(filename):
     Returns:
     --------
     df : pandas.DataFrame
-        DataFrame with columns: geometry_idx, q, theta, phi, and optionally conformation
+        DataFrame with columns: geometry_idx (int32), q, theta, phi (float32), and
+        optionally conformation
+    
+    The parsed columns are cached in a ``<filename>.npz`` sidecar, which is
+    loaded instead of the text file as long as it is newer than the file and
+    was written with the current PARAMS_CACHE_VERSION.
     """
-    # Read data, skipping comment lines
-    df = pd.read_csv(filename, sep=r'\s+', comment='#')
-    
-    # Check if conformation column exists (for .classified.dat files)
-    if 'conformation' in df.columns:
-        # Keep conformation as string, convert others to numeric
-        numeric_cols = ['geometry_idx', 'q', 'theta', 'phi']
-        df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
-    else:
-        # Ensure all columns are numeric for .params.dat files
-        df = df.apply(pd.to_numeric, errors='coerce')
+    cache_file = filename + '.npz'
+    if (os.path.exists(cache_file)
+            and os.path.getmtime(cache_file) >= os.path.getmtime(filename)):
+        try:
+            with np.load(cache_file) as cache:
+                if ('cache_version' in cache.files
+                        and cache['cache_version'] == PARAMS_CACHE_VERSION):
+                    df = pd.DataFrame({col: cache[col] for col in cache.files
+                                       if col != 'cache_version'})
+                    if 'conformation' in df.columns:
+                        df['conformation'] = pd.Categorical(df['conformation'])
+                    return df
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            # Corrupt or foreign sidecar: parse the text file and replace it
+            pass
+    
+    df = _parse_params_file(filename)
+    
+    # Write the sidecar through a uniquely named temporary file, so an
+    # interrupted run never leaves a truncated cache behind and concurrent
+    # writers do not share a path; failing to cache is not an error
+    tmp_file = None
+    try:
+        fd, tmp_file = tempfile.mkstemp(suffix='.tmp',
+                                        dir=os.path.dirname(cache_file) or '.')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, cache_version=PARAMS_CACHE_VERSION,
+                     **{col: (df[col].to_numpy(dtype=str) if col == 'conformation'
+                              else df[col].to_numpy())
+                        for col in df.columns})
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        if tmp_file is not None and os.path.exists(tmp_file):
+            os.remove(tmp_file)
+    
+    return df
+
+
+def _parse_params_file(filename):
+    """Parse a .params.dat or .classified.dat text file (see read_params_file)"""
+    # Column names come from the header line (first non-comment line)
+    with open(filename, 'r') as f:
+        for header_idx, line in enumerate(f):
+            if line.strip() and not line.lstrip().startswith('#'):
+                columns = line.split()
+                break
+        else:
+            raise ValueError(f"No header line found in {filename}")
+    
+    # Read numeric columns with NumPy's C tokenizer instead of the regex
+    # separator and per-column to_numeric of pd.read_csv
+    numeric_cols = [col for col in columns if col != 'conformation']
+    values = np.loadtxt(filename, comments='#', skiprows=header_idx + 1,
+                        usecols=[columns.index(col) for col in numeric_cols],
+                        ndmin=2)
+    df = pd.DataFrame(values, columns=numeric_cols)
+    if 'geometry_idx' in df.columns:
+        df['geometry_idx'] = df['geometry_idx'].astype(np.int32)
+    
+    # Single precision is plenty for plotting and halves the memory traffic
+    # through spherical_to_cartesian and matplotlib
+    float_cols = [col for col in numeric_cols if col != 'geometry_idx']
+    df[float_cols] = df[float_cols].astype(np.float32)
+    
+    # Keep conformation as a categorical column (for .classified.dat files)
+    if 'conformation' in columns:
+        conf_idx = columns.index('conformation')
+        with open(filename, 'r') as f:
+            rows = itertools.islice(f, header_idx + 1, None)
+            df['conformation'] = pd.Categorical([
+                line.split()[conf_idx] for line in rows
+                if line.strip() and not line.lstrip().startswith('#')
+            ])
     
     return df
 
@@ -70,14 +149,25 @@ def spherical_to_cartesian(q, theta, phi):
     x, y, z : arrays
         Cartesian coordinates
     """
-    phi_rad = np.deg2rad(phi)
-    x = q * np.sin(theta) * np.cos(phi_rad)
-    y = q * np.sin(theta) * np.sin(phi_rad)
-    z = q * np.cos(theta)
+    q = np.asarray(q)
+    theta = np.asarray(theta)
+    phi = np.asarray(phi)
+    
+    # Compute in place inside one preallocated block (x, y, z plus a scratch
+    # row for phi in radians) instead of allocating a temporary for every
+    # ufunc in the chain
+    shape = np.broadcast_shapes(q.shape, theta.shape, phi.shape)
+    block = np.empty((4,) + shape, dtype=np.result_type(q, theta, phi, 1.0))
+    x, y, z, phi_rad = (block[i, ...] for i in range(4))
+    np.deg2rad(phi, out=phi_rad)
+    np.multiply(q, np.cos(theta, out=z), out=z)
+    np.multiply(q, np.sin(theta, out=x), out=x)   # q * sin(theta)
+    np.multiply(x, np.sin(phi_rad, out=y), out=y)
+    np.multiply(x, np.cos(phi_rad, out=phi_rad), out=x)
     return x, y, z
 
 
-def plot_sphere_wireframe(ax, max_q, alpha=0.1, color='gray'):
+def plot_sphere_wireframe(ax, max_q, alpha=0.1, color='gray', n=20):
     """
     Plot a wireframe sphere as reference
     
@@ -91,31 +181,52 @@ def plot_sphere_wireframe(ax, max_q, alpha=0.1, color='gray'):
         Transparency
     color : str
         Color of wireframe
+    n : int
+        Number of grid points along each angle. The sphere is only a
+        reference guide, so a coarse grid keeps the 3D line sorting cheap.
     """
-    u = np.linspace(0, 2 * np.pi, 50)
-    v = np.linspace(0, np.pi, 50)
-    x = max_q * np.outer(np.cos(u), np.sin(v))
-    y = max_q * np.outer(np.sin(u), np.sin(v))
-    z = max_q * np.outer(np.ones(np.size(u)), np.cos(v))
+    # Column u and row v broadcast to the (n, n) grid, without np.outer or
+    # a ones array for z
+    u = np.linspace(0, 2 * np.pi, n)[:, None]
+    v = np.linspace(0, np.pi, n)[None, :]
+    r_sin_v = max_q * np.sin(v)
+    x = np.cos(u) * r_sin_v
+    y = np.sin(u) * r_sin_v
+    z = np.broadcast_to(max_q * np.cos(v), (n, n))
     ax.plot_wireframe(x, y, z, color=color, alpha=alpha, linewidth=0.5)
 
 
-def plot_cramer_pople_3d(param_files, output_file=None):
+def _load_and_project(param_file):
+    """Read one parameter file; return its largest q and Cartesian points"""
+    df = read_params_file(param_file)
+    # The columns are already float32, so take them without copying
+    q = df['q'].to_numpy(copy=False)
+    x, y, z = spherical_to_cartesian(q, df['theta'].to_numpy(copy=False),
+                                     df['phi'].to_numpy(copy=False))
+    # nanmax: geometries that failed the Cramer-Pople step are stored as nan
+    return np.nanmax(q), x, y, z
+
+
+def collect_sphere_points(param_files):
     """
-    Create 3D sphere plot of Cramer-Pople parameters
+    Read parameter files and convert all geometries to points on the sphere
     
     Parameters:
     -----------
     param_files : list
         List of .params.dat files to plot
-    output_file : str, optional
-        If provided, save figure to this file
-    """
-    fig = plt.figure(figsize=(10, 10))
-    
-    # Main 3D plot
-    ax1 = fig.add_subplot(111, projection='3d')
     
+    Returns:
+    --------
+    xyz : numpy.ndarray
+        (n_points, 3) Cartesian coordinates of the geometries of all files
+    colors : numpy.ndarray
+        (n_points, 4) RGBA color of every point
+    spawns : list of tuple
+        (spawn number, color) of each file, for the legend
+    max_q : float
+        Largest puckering amplitude over all files
+    """
     # Define specific colors for each spawn number
     color_map = {
         '2': 'red',
@@ -125,35 +236,70 @@ def plot_cramer_pople_3d(param_files, output_file=None):
         '6': 'purple'
     }
     
-    all_q = []
-    
-    for idx, param_file in enumerate(param_files):
-        # Read data
-        df = read_params_file(param_file)
+    # Resolve every file's color once: spawn colors from color_map, tab10
+    # by file position otherwise
+    spawn_nums = []
+    for param_file in param_files:
         label = param_file.replace('.params.dat', '').replace('.spawn.classified.dat', '')
-        
-        # Get color based on spawn number
-        spawn_num = label.split('.')[0] if '.' in label else label
-        color = color_map.get(spawn_num, plt.cm.tab10(idx))
-        
-        # Convert to Cartesian
-        x, y, z = spherical_to_cartesian(df['q'].values, df['theta'].values, df['phi'].values)
-        
-        all_q.extend(df['q'].values)
-        
-        # 3D scatter plot
-        ax1.scatter(x, y, z, c=color, label=f"Spawn {spawn_num}", alpha=0.6, s=20)
+        spawn_nums.append(label.split('.')[0] if '.' in label else label)
+    fallback = plt.cm.tab10(np.arange(len(param_files)) % 10)
+    file_colors = [color_map.get(spawn_num, tuple(map(float, fallback[idx])))
+                   for idx, spawn_num in enumerate(spawn_nums)]
+    color_lookup = to_rgba_array(file_colors).astype(np.float32)
+    spawns = list(zip(spawn_nums, file_colors))
+    
+    # Read and project the files in this process: with the .npz sidecars each
+    # file takes milliseconds, far less than starting worker processes
+    projected = [_load_and_project(param_file) for param_file in param_files]
+    
+    # Points of all files are gathered so they can be drawn as a single
+    # collection; only the largest q is needed
+    max_q = np.nanmax([file_max_q for file_max_q, _, _, _ in projected])
+    xs = [x for _, x, _, _ in projected]
+    ys = [y for _, _, y, _ in projected]
+    zs = [z for _, _, _, z in projected]
+    
+    # Expand the per-file colors to one RGBA row per point in a single call
+    counts = [x.size for x in xs]
+    colors = np.repeat(color_lookup, counts, axis=0)
+    
+    xyz = np.column_stack([np.concatenate(xs), np.concatenate(ys), np.concatenate(zs)])
+    return xyz, colors, spawns, max_q
+
+
+def plot_cramer_pople_3d(param_files, output_file=None):
+    """
+    Create 3D sphere plot of Cramer-Pople parameters
+    
+    Parameters:
+    -----------
+    param_files : list
+        List of .params.dat files to plot
+    output_file : str, optional
+        If provided, save figure to this file
+    """
+    fig = plt.figure(figsize=(10, 10))
+    
+    # Main 3D plot
+    ax1 = fig.add_subplot(111, projection='3d')
+    
+    xyz, colors, spawns, max_q = collect_sphere_points(param_files)
+    
+    # 3D scatter plot, with one legend proxy per spawn
+    ax1.scatter(xyz[:, 0], xyz[:, 1], xyz[:, 2], c=colors, alpha=0.6, s=20)
+    legend_handles = [Line2D([], [], linestyle='', marker='o', color=color,
+                             alpha=0.6, label=f"Spawn {spawn_num}")
+                      for spawn_num, color in spawns]
     
     # Plot reference sphere
-    max_q = max(all_q) * 1.1
-    plot_sphere_wireframe(ax1, max_q)
+    plot_sphere_wireframe(ax1, max_q * 1.1)
     
     # Configure 3D plot
     ax1.set_xlabel('X (Å)', fontsize=12)
     ax1.set_ylabel('Y (Å)', fontsize=12)
     ax1.set_zlabel('Z (Å)', fontsize=12)
     ax1.set_title('Cramer-Pople Puckering Sphere\n(q, θ, φ) in Cartesian coordinates', fontsize=14, fontweight='bold')
-    ax1.legend(loc='upper left', fontsize=10)
+    ax1.legend(handles=legend_handles, loc='upper left', fontsize=10)
     ax1.set_box_aspect([1,1,1])
     
     plt.tight_layout()
@@ -165,24 +311,75 @@ def plot_cramer_pople_3d(param_files, output_file=None):
     plt.show()
 
 
+def plot_cramer_pople_3d_gpu(param_files):
+    """
+    Interactive GPU-rendered 3D sphere plot of Cramer-Pople parameters
+    
+    Uses VisPy (optional dependency) instead of matplotlib. The points are
+    uploaded to the GPU once, so rotating and zooming stays fluid even for
+    millions of geometries. The window is interactive only; nothing is saved.
+    
+    Parameters:
+    -----------
+    param_files : list
+        List of .params.dat files to plot
+    """
+    from vispy import app, scene
+    
+    xyz, colors, spawns, max_q = collect_sphere_points(param_files)
+    # colors is a fresh float32 array, so the alpha can be set in place
+    colors[:, 3] = 0.6
+    
+    canvas = scene.SceneCanvas(title='Cramer-Pople Puckering Sphere', keys='interactive',
+                               size=(1000, 1000), bgcolor='white', show=True)
+    view = canvas.central_widget.add_view()
+    view.camera = scene.TurntableCamera(fov=45, distance=4 * max_q)
+    
+    # Points
+    markers = scene.visuals.Markers(parent=view.scene)
+    markers.set_data(xyz, face_color=colors, edge_width=0, size=6)
+    
+    # Reference sphere, drawn as a light wireframe
+    scene.visuals.Sphere(radius=max_q * 1.1, rows=20, cols=20, method='latitude',
+                         color=(1, 1, 1, 0), edge_color=(0.5, 0.5, 0.5, 0.2),
+                         parent=view.scene)
+    
+    # VisPy has no legend, so list the spawn colors in the terminal
+    for spawn_num, color in spawns:
+        print(f"  Spawn {spawn_num}: {color}")
+    
+    app.run()
+
+
 def main():
     """Main function"""
     
-    if len(sys.argv) < 2:
-        print("Usage: python plot_cramer_pople.py <params_file1> [params_file2 ...]")
+    # --gpu switches to the interactive VisPy renderer
+    use_gpu = '--gpu' in sys.argv[1:]
+    param_files = [arg for arg in sys.argv[1:] if arg != '--gpu']
+    
+    if len(param_files) < 1:
+        print("Usage: python plot_cramer_pople.py [--gpu] <params_file1> [params_file2 ...]")
         print("Example: python plot_cramer_pople.py 6.params.dat")
         print("Example: python plot_cramer_pople.py 2.spawn.classified.dat")
         print("Example: python plot_cramer_pople.py 2.params.dat 3.params.dat 4.params.dat 5.params.dat 6.params.dat")
+        print("Example: python plot_cramer_pople.py --gpu 2.params.dat 3.params.dat")
         sys.exit(1)
     
-    param_files = sys.argv[1:]
-    
     print("\n" + "=" * 70)
     print("Cramer-Pople Ring Puckering Visualization")
     print("=" * 70)
     print(f"Files to plot: {param_files}")
     print()
     
+    if use_gpu:
+        if importlib.util.find_spec('vispy') is None:
+            print("❌ --gpu requires the vispy package (pip install vispy)")
+            sys.exit(1)
+        print("Creating interactive GPU sphere plot...")
+        plot_cramer_pople_3d_gpu(param_files)
+        return
+    
     # Create output filename
     if len(param_files) == 1:
         base_name = param_files[0].replace('.params.dat', '').replace('.spawn.classified.dat', '')
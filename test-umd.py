@@ -12,26 +12,39 @@ ring = umd.RingParams(ring_atom_ind=ring_atoms)
 ring.read_all_trajs()
 
 # Step 4: Manually calculate parameters and classify
-all_pucker_params = []
-for xyz in ring.ring_coords:
+# get_pucker_coords works on one frame, so fill a preallocated array
+# instead of stacking a list of per-frame results afterwards
+n_frames = len(ring.ring_coords)
+all_pucker_params = None
+for i, xyz in enumerate(ring.ring_coords):
     cppar = ring.get_pucker_coords(xyz)
-    all_pucker_params.append(cppar)
-
-all_pucker_params = np.asarray(all_pucker_params, dtype=np.float64)
+    if all_pucker_params is None:
+        all_pucker_params = np.empty((n_frames, np.size(cppar)), dtype=np.float64)
+    all_pucker_params[i] = cppar
 
 # Step 5: Convert to polar coordinates for 6-membered ring
 polar_coords = ring._cp_to_polar(all_pucker_params)
-df = pd.DataFrame(polar_coords)
-
-# Step 6: Add classification
-func_vec = np.vectorize(ring.get_conf_6memb)
-df["class"] = func_vec(df["theta"].values, df["phi"].values)
 
-# Step 7: Add TRAJ and Time info manually
+# Step 6: Classify each frame
+# get_conf_6memb is a scalar function; call it directly on plain floats
+# rather than through np.vectorize, which adds per-element overhead.
+# Stored as a categorical: a few labels repeated over every frame
+conf_class = pd.Categorical([
+    ring.get_conf_6memb(theta, phi)
+    for theta, phi in zip(np.asarray(polar_coords["theta"]).tolist(),
+                          np.asarray(polar_coords["phi"]).tolist())
+])
+
+# Step 7: Build the table in one go, with TRAJ and Time info first,
+# instead of inserting columns into an existing DataFrame
+columns = {}
 if ring.traj_time is not None:
-    df.insert(0, "TRAJ", ring.traj_time[:, 0])
-    df.insert(1, "Time", ring.traj_time[:, 1])
-    df["TRAJ"] = df["TRAJ"].astype("int32")
+    columns["TRAJ"] = ring.traj_time[:, 0].astype(np.int32)
+    columns["Time"] = ring.traj_time[:, 1]
+for key in polar_coords:
+    columns[key] = polar_coords[key]
+columns["class"] = conf_class
+df = pd.DataFrame(columns, copy=False)
 
 # Step 8: Save to CSV
 df.to_csv("all_ring_params.csv", index=False)